@@ -24,6 +24,9 @@ from lib.common.utils import Utils
 from lib.common.CreatLog import logs, log_name
 import importlib
 
+# 报告侧边栏条目形如 "类型名 数量"，解析每个报告时都要用到
+_SIDEBAR_ITEM_RE = re.compile(r'^(.*?)(\d+)$')
+
 class Program():
     def __init__(self, options):
         self.options = options
@@ -247,6 +250,15 @@ def parse_detailed_report(report_path):
     summary = "已扫描，未发现敏感信息"
     details = defaultdict(list)
     try:
+        # 优先读取同目录下的JSON结果，避免用BeautifulSoup解析整个HTML报告
+        json_path = os.path.join(os.path.dirname(report_path), 'sensitive_info.json')
+        if os.path.exists(json_path):
+            with open(json_path, 'r', encoding='utf-8') as f:
+                findings = json.load(f)
+            if findings:
+                summary = ", ".join(f"{ftype}: {len(items)}" for ftype, items in findings.items())
+            return summary, findings
+
         with open(report_path, 'r', encoding='utf-8') as f:
             content = f.read()
             if "未发现敏感信息" in content:
@@ -256,7 +268,7 @@ def parse_detailed_report(report_path):
         findings_summary = Counter()
         sidebar_links = soup.select('.sidebar ul li a')
         for link in sidebar_links:
-            match = re.match(r'^(.*?)(\d+)$', link.get_text(strip=True))
+            match = _SIDEBAR_ITEM_RE.match(link.get_text(strip=True))
             if match:
                 finding_type, count = match.groups()
                 findings_summary[finding_type.strip()] = int(count)
@@ -358,13 +370,14 @@ def PackerInfoFinder():
             exit(1)
 
         print(f"开始扫描 {total_urls} 个 URL...")
+        # 出口IP/代理连通性与具体URL无关，整批只检测一次
+        testProxy(options, 1)
 
         for i, url in enumerate(urls, 1):
             print(f"\n[{i}/{total_urls}] 开始扫描 URL: {url}")
             print("==================================================")
             
             new_tag = reset_project_tag()
-            testProxy(options, 1)
             options.url = url
             InfoFinder = Program(options)
             try:
@@ -1,18 +1,19 @@
 # !/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 
-import requests, sqlite3, warnings, os
+import requests, sqlite3, warnings, os, mmap
 from lib.common.utils import Utils
 from lib.Database import DatabaseType
 
 
 class CheckPacker():
 
-    def __init__(self, projectTag, url, options):
+    def __init__(self, projectTag, url, options, html_content=None):
         warnings.filterwarnings('ignore') #不显示警告，后期可以优化为全局的
         self.fingerprint_html = ['<noscript','webpackJsonp','<script id=\"__NEXT_DATA__','webpack-','<style id=\"gatsby-inlined-css','<div id=\"___gatsby','<meta name=\"generator\" content=\"phoenix','<meta name=\"generator\" content=\"Gatsby','<meta name=\"generator\" content=\"Docusaurus'];
         self.fingerprint_js = ['webpackJsonp','gulp'];
         self.url = url
+        self.html_content = html_content
         self.projectTag = projectTag
         self.options = options
         self.proxy_data = {'http': self.options.proxy,'https': self.options.proxy}
@@ -30,19 +31,26 @@ class CheckPacker():
     def checkJS(self):
         projectPath = DatabaseType(self.projectTag).getPathfromDB()
         flag = 0
+        fingerprints = [i.encode('utf-8') for i in self.fingerprint_js]
         for parent, dirnames, filenames in os.walk(projectPath, followlinks=True):
             for filename in filenames:
-                if filename != self.projectTag + ".db":
+                if not filename.startswith(self.projectTag + ".db"):  # 跳过数据库及其 -wal/-shm 文件
                     filePath = os.path.join(parent, filename)
-                    jsOpen = open(filePath, 'r', encoding='UTF-8',errors="ignore")  # 防编码报错
-                    jsFile = jsOpen.readlines()
-                    jsFile = str(jsFile)  # 二次转换防报错
-                    if any(i in jsFile for i in self.fingerprint_js):
-                        flag = 1
-                        break
+                    if os.path.getsize(filePath) == 0:  # 空文件无法mmap
+                        continue
+                    # 直接在映射的文件内容上按字节查找指纹，不必读入并解码整个文件
+                    with open(filePath, 'rb') as jsOpen, \
+                            mmap.mmap(jsOpen.fileno(), 0, access=mmap.ACCESS_READ) as jsFile:
+                        if hasattr(mmap, 'MADV_SEQUENTIAL'):  # 顺序扫描，提示内核预读(Windows无此接口)
+                            jsFile.madvise(mmap.MADV_SEQUENTIAL)
+                        if any(jsFile.find(i) != -1 for i in fingerprints):
+                            flag = 1
+                            return flag
         return flag
 
     def checkHTML(self):
+        if self.html_content is not None:  # 复用 ParseJs 已获取的首页，不再重复请求
+            return 1 if any(i in self.html_content for i in self.fingerprint_html) else 0
         headers = self.header
         url = self.url
         sslFlag = int(self.options.ssl_flag)
@@ -5,12 +5,9 @@ import os
 from lib.ParseJs import ParseJs
 from lib.common.utils import Utils
 from lib.Database import DatabaseType
-from lib.FuzzParam import FuzzerParam
 from lib.CheckPacker import CheckPacker
-from lib.common.beautyJS import BeautyJs
 from lib.Recoverspilt import RecoverSpilt
 from lib.common.CreatLog import creatLog,log_name,logs
-from lib.JsFinder.JsFinderModule import JsFinderModule  #引入js文件扫描模块
 
 class Project():
 
@@ -28,12 +25,13 @@ class Project():
         if self.options.silent != None:
             print("[TAG]" + projectTag)
         DatabaseType(projectTag).createDatabase()
-        ParseJs(projectTag, self.url, self.options).parseJsStart()
+        parser = ParseJs(projectTag, self.url, self.options)
+        parser.parseJsStart()
         path_log = os.path.abspath(log_name)
         path_db = os.path.abspath(DatabaseType(projectTag).getPathfromDB() + projectTag + ".db")
         creatLog().get_logger().info("[+] " + "缓存文件路径：" + path_db)  #显示数据库文件路径
         creatLog().get_logger().info("[+] " + "日志文件路径：" + path_log) #显示log文件路径
-        checkResult = CheckPacker(projectTag, self.url, self.options).checkStart()
+        checkResult = CheckPacker(projectTag, self.url, self.options, parser.html_content).checkStart()
         if checkResult == 1 or checkResult == 777: #打包器检测模块
             if checkResult != 777: #确保检测报错也能运行
                 creatLog().get_logger().info("[v] " + "恭喜，这个站点很可能是通过前端打包器构建的！")
@@ -44,6 +42,7 @@ class Project():
         # 如果启用了finder参数，执行JavaScript敏感信息扫描
         if hasattr(self.options, 'finder') and self.options.finder:
             creatLog().get_logger().info("[+] " + "已启用JavaScript敏感信息扫描...")
+            from lib.JsFinder.JsFinderModule import JsFinderModule  # 仅在启用finder时才引入js文件扫描模块
             js_finder = JsFinderModule(projectTag, self.options)
             
             # --- 修复：恢复原始的调用方式，不再关心返回值 ---
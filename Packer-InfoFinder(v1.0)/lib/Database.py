@@ -9,6 +9,9 @@ from lib.common.utils import Utils
 from lib.common.CreatLog import creatLog
 from lib.common.readConfig import ReadConfig
 
+# 项目标签 -> 项目目录；项目写入main.db后host不会再变，各模块反复查询时无需每次都打开main.db
+_PROJECT_PATH_CACHE = {}
+
 
 class DatabaseType():
 
@@ -73,6 +76,8 @@ class DatabaseType():
             connect = sqlite3.connect(db_path)
             cursor = connect.cursor()
             connect.isolation_level = None
+            # WAL模式写入数据库文件后持久生效：下载线程写入时不阻塞读取，且每次提交无需整页回滚日志
+            cursor.execute("PRAGMA journal_mode=WAL")
             cursor.execute('''CREATE TABLE if not exists info(
                          name       TEXT    PRIMARY KEY     NOT NULL,
                          vaule      TEXT                            );''')
@@ -114,6 +119,9 @@ class DatabaseType():
             self.log.error("[Err] 创建数据库失败: %s" % e)
 
     def getPathfromDB(self):
+        projectPath = _PROJECT_PATH_CACHE.get(self.projectTag)
+        if projectPath is not None:
+            return projectPath
         path = os.getcwd() + os.sep + "main.db"
         conn = sqlite3.connect(path)
         cursor = conn.cursor()
@@ -122,6 +130,7 @@ class DatabaseType():
         host = cursor.fetchone()[0]  # 第一个即可
         conn.close()
         projectPath = "tmp" + os.sep + self.projectTag + "_" + host + os.sep
+        _PROJECT_PATH_CACHE[self.projectTag] = projectPath
         return projectPath
 
     def getJsUrlFromDB(self, localFileName, projectPath):
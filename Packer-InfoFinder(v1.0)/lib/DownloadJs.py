@@ -15,6 +15,16 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from lib.common import readConfig
 from lib.common.utils import Utils
 from lib.common.CreatLog import creatLog
+from lib.common.userAgents import USER_AGENTS
+
+# 判断下载内容是否为HTML页面，只检查开头，不必为整个文件做strip/lower拷贝
+_HTML_PREFIX_RE = re.compile(rb'\s*<(?:!doctype html>|html)', re.IGNORECASE)
+
+# webpack publicPath 的赋值写法，按优先级排列；每个下载的JS都要匹配，模块加载时编译一次
+_WEBPACK_PUBLIC_PATH_RES = (
+    re.compile(rb'__webpack_require__\.p\s*=\s*[\'"]([^\'"]+)[\'"]'),
+    re.compile(rb'\.p\s*=\s*[\'"]([^\'"]+)[\'"]'),
+)
 
 
 class DownloadJs():
@@ -26,23 +36,7 @@ class DownloadJs():
         self.blacklistFilenames = readConfig.ReadConfig().getValue('blacklist', 'filename')[0]
         self.options = options
         self.proxy_data = {'http': self.options.proxy, 'https': self.options.proxy}
-        self.UserAgent = [
-            "Mozilla/5.0 (Windows NT 6.1; WOW64; rv:34.0) Gecko/20100101 Firefox/34.0",
-            "Mozilla/4.0 (compatible; MSIE 6.0; Windows NT 5.1; en) Opera 9.50",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/534.57.2 (KHTML, like Gecko) Version/5.1.7 Safari/534.57.2",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.71 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.11 (KHTML, like Gecko) Chrome/23.0.1271.64 Safari/537.11",
-            "Mozilla/5.0 (Windows; U; Windows NT 6.1; en-US) AppleWebKit/534.16 (KHTML, like Gecko) Chrome/10.0.648.133 Safari/534.16",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64; Trident/7.0; rv:11.0) like Gecko",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/536.11 (KHTML, like Gecko) Chrome/20.0.1132.11 TaoBrowser/2.0 Safari/536.11",
-            "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Maxthon/4.4.3.4000 Chrome/30.0.1599.101 Safari/537.36",
-            "Mozilla/4.0 (compatible; MSIE 7.0; Windows NT 5.1; Trident/4.0; SV1; QQDownload 732; .NET4.0C; .NET4.0E; SE 2.X MetaSr 1.0)",
-            "Mozilla/4.0 (compatible; MSIE 6.0; Windows NT 5.1; SV1; QQDownload 732; .NET4.0C; .NET4.0E; LBBROWSER)",
-            "Mozilla/5.0 (Windows; U; Windows NT 6.1; en-us) AppleWebKit/534.50 (KHTML, like Gecko) Version/5.1 Safari/534.50",
-            "Mozilla/5.0 (compatible; MSIE 9.0; Windows NT 6.1; Trident/5.0",
-            "Opera/9.80 (Windows NT 6.1; U; en) Presto/2.8.131 Version/11.11",
-            "Mozilla/4.0 (compatible; MSIE 7.0; Windows NT 5.1; TencentTraveler 4.0)"
-        ]
+        self.UserAgent = USER_AGENTS
         self.log = creatLog().get_logger()
         self.successful_path_patterns = {}
         self.webpack_public_path = None
@@ -85,14 +79,11 @@ class DownloadJs():
             self.log.error(f"[Err] 分析路径模式时出错: {str(e)}")
 
     def extract_webpack_public_path(self, js_content):
-        patterns = [
-            r'__webpack_require__\.p\s*=\s*[\'"]([^\'"]+)[\'"]',
-            r'\.p\s*=\s*[\'"]([^\'"]+)[\'"]',
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, js_content)
-            if matches:
-                return matches[0]
+        # 直接在原始字节上匹配，只解码命中的路径，无需先把整个JS文件解码成字符串
+        for pattern in _WEBPACK_PUBLIC_PATH_RES:
+            match = pattern.search(js_content)
+            if match:
+                return match.group(1).decode('utf-8', errors='ignore')
         return None
 
     def infer_path(self, original_path):
@@ -112,20 +103,19 @@ class DownloadJs():
             return [original_path]
 
     def jsBlacklist(self):
-        newList = self.jsRealPaths[:]
-        for jsRealPath in newList:
-            res = urlparse(jsRealPath)
-            domain = res.netloc.lower()
-            filename = Utils().getFilename(jsRealPath).lower()
-            for d in self.blacklist_domains.split(","):
-                if d in domain:
-                    self.jsRealPaths.remove(jsRealPath)
-                    break
-            for f in self.blacklistFilenames.split(","):
-                if f in filename:
-                    if jsRealPath in self.jsRealPaths:
-                        self.jsRealPaths.remove(jsRealPath)
-                    break
+        # 一次遍历构建过滤后的列表，避免逐个 list.remove 带来的O(N²)开销
+        blacklistDomains = self.blacklist_domains.split(",")
+        blacklistFilenames = self.blacklistFilenames.split(",")
+        newList = []
+        for jsRealPath in self.jsRealPaths:
+            domain = urlparse(jsRealPath).netloc.lower()
+            if any(d in domain for d in blacklistDomains):
+                continue
+            filename = Utils.getFilename(jsRealPath).lower()
+            if any(f in filename for f in blacklistFilenames):
+                continue
+            newList.append(jsRealPath)
+        self.jsRealPaths = newList
         return self.jsRealPaths
 
     def download_single_js(self, jsRealPath, tag, host, spiltId):
@@ -177,12 +167,12 @@ class DownloadJs():
             self.analyze_path_patterns(jsRealPath)
             
             jsFileData = response.content
-            if jsFileData.strip().lower().startswith((b'<!doctype html>', b'<html')):
+            if _HTML_PREFIX_RE.match(jsFileData):
                 self.log.error(f"[Err] 下载内容为HTML，非JS: {jsFilename}")
                 return
 
             if not self.webpack_public_path:
-                self.webpack_public_path = self.extract_webpack_public_path(jsFileData.decode('utf-8', errors='ignore'))
+                self.webpack_public_path = self.extract_webpack_public_path(jsFileData)
 
             file_path = f"tmp{os.sep}{tag}_{host}{os.sep}{jsTag}.{jsFilename}"
             with open(file_path, "wb") as js_file:
@@ -222,8 +212,11 @@ class DownloadJs():
         # --- 优化：增加并发工作线程数 ---
         # 对于像下载这样的I/O密集型任务，更多的线程可以显著提高速度。
         # 这个值可以根据网络状况和目标服务器的性能进行调整。
-        max_workers = 30
-        
+        # 线程数不超过待下载的URL数量，避免小批量(如异步JS分批下载)时创建空闲线程
+        if not filtered_urls:
+            return
+        max_workers = min(30, len(filtered_urls))
+
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             futures = [executor.submit(self.download_single_js, jsRealPath, tag, host, spiltId) for jsRealPath in filtered_urls]
             for future in as_completed(futures):
@@ -50,7 +50,7 @@ class FuzzerParam():
                 api_get_list = ""
                 api_id = "§§§" + str(api[0]) + "§§§\n"
                 for filename in filenames:
-                    if filename != self.projectTag + ".db":
+                    if not filename.startswith(self.projectTag + ".db"):  # 跳过数据库及其 -wal/-shm 文件
                         filePath = os.path.join(parent, filename)
                         with open(filePath, "r", encoding="utf-8",errors="ignore") as f:
                             js_strs = f.readlines()
@@ -6,13 +6,34 @@ import os
 import json
 import html # 修复: 导入 html 模块
 import requests
-from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Set
 from lib.common.CreatLog import creatLog
 from lib.common.utils import Utils
 from lib.Database import DatabaseType
 import multiprocessing
 
+# 提取接口路径的正则，每个JS文件都要用到，模块加载时编译一次
+_PATH_RE = re.compile(r'''['"](?:/|(?:https?:) ?//)[^\s'"]+?['"]''')
+_NEWLINE_RE = re.compile('\n')
+
+# 子进程中的扫描器实例，由进程池的 initializer 在每个子进程中设置一次
+_worker_finder = None
+
+
+def _init_worker(finder):
+    global _worker_finder
+    _worker_finder = finder
+
+
+def _process_js_file_worker(file_path):
+    """进程池任务：只传递文件路径，由子进程自行读取并扫描文件。
+    spawn 方式启动的子进程(Windows)中日志没有配置处理器，错误信息随结果返回，由主进程记录"""
+    return _worker_finder.process_js_file(file_path)
+
+
 class JsFinderModule:
     def __init__(self, projectTag, options):
         self.projectTag = projectTag
@@ -57,10 +78,11 @@ class JsFinderModule:
             "Username/Account": r'((|\'|")(|[\w]{1,10})(([u](ser|name|sername))|(account)|((((create|update)((d|r)|(by|on|at)))|(creator))))(|[\w]{1,10})(|\'|")(:|=)( |)(\'|")(.*?)(\'|")(|,))'
         }
     
-    def find_matches(self, content: str, filename: str) -> Dict[str, List[Tuple[str, str, str]]]:
-        """在JavaScript内容中查找匹配的敏感信息"""
+    def find_matches(self, content: str, filename: str, errors: List[str] = None) -> Dict[str, List[Tuple[str, str, str]]]:
+        """在JavaScript内容中查找匹配的敏感信息，传入 errors 时错误信息追加到其中而不直接写日志"""
         matches = {}
-        lines = content.splitlines()
+        # 换行符偏移表，每个文件只在出现第一个匹配时计算一次，之后用二分查找定位行号
+        newline_offsets = None
         
         for pattern_name, compiled_pattern in self.compiled_regex_patterns.items():
             pattern_matches = set()
@@ -69,7 +91,9 @@ class JsFinderModule:
                     matched_text = match.group(0)
                     start_pos = match.start()
                     
-                    line_num = content[:start_pos].count('\n') + 1
+                    if newline_offsets is None:
+                        newline_offsets = [m.start() for m in _NEWLINE_RE.finditer(content)]
+                    line_num = bisect_left(newline_offsets, start_pos) + 1
                     
                     context_start = max(0, start_pos - 300)
                     context_end = min(len(content), start_pos + len(matched_text) + 300)
@@ -83,7 +107,11 @@ class JsFinderModule:
                         context
                     ))
             except re.error as e:
-                self.log.error(f"正则表达式 '{pattern_name}' 无效: {e}")
+                message = f"正则表达式 '{pattern_name}' 无效: {e}"
+                if errors is None:
+                    self.log.error(message)
+                else:
+                    errors.append(message)
                 continue
             
             if pattern_matches:
@@ -96,34 +124,30 @@ class JsFinderModule:
         paths = set()
         path_to_file_mapping = []
         
-        path_patterns = [
-            r'''['"](?:/|(?:https?:) ?//)[^\s'"]+?['"]''',
-            r'''(?:src|href|url)\s*[:=]\s*['"][^'"]+['"]''',
-            r'''(?:path|route)\s*[:=]\s*['"][^'"]+['"]'''
-        ]
+        # 只需扫描一遍：带键名的 src/href/url/path/route 写法中，引号内的路径本身也会被该模式匹配到
+        for match in _PATH_RE.finditer(content):
+            path = match.group(0).strip('\'"')
+            if path.startswith(('/', 'http://', 'https://') ) and not path.endswith(('.js', '.css')):
+                paths.add(path)
+                path_to_file_mapping.append(f"{filename}----{path}")
         
-        for pattern in path_patterns:
-            for match in re.finditer(pattern, content):
-                path = match.group(0).strip('\'"')
-                if path.startswith(('/', 'http://', 'https://') ) and not path.endswith(('.js', '.css')):
-                    paths.add(path)
-                    path_to_file_mapping.append(f"{filename}----{path}")
-        
-        return sorted(paths), path_to_file_mapping
+        # 汇总后会统一排序，这里无需逐文件排序
+        return list(paths), path_to_file_mapping
     
-    def process_js_file(self, file_path: str) -> Tuple[Dict, List, List]:
-        """处理单个JavaScript文件"""
+    def process_js_file(self, file_path: str) -> Tuple[Dict, List, List, List]:
+        """处理单个JavaScript文件，在子进程中运行，错误信息随结果一起返回"""
+        errors = []
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
                 content = file.read()
         except Exception as e:
-            self.log.error(f"无法读取文件 {file_path}: {e}")
-            return {}, [], []
+            errors.append(f"无法读取文件 {file_path}: {e}")
+            return {}, [], [], errors
         
         filename = os.path.basename(file_path)
-        matches = self.find_matches(content, filename)
+        matches = self.find_matches(content, filename, errors)
         unique_paths, path_mappings = self.extract_paths(content, filename)
-        return matches, unique_paths, path_mappings
+        return matches, unique_paths, path_mappings, errors
     
     def process_js_files(self, js_files_dir: str) -> None:
         """处理目录中的所有JavaScript文件"""
@@ -146,19 +170,21 @@ class JsFinderModule:
         
         self.log.info(f"找到 {len(file_paths)} 个JavaScript文件，开始扫描敏感信息...")
         
-        all_matches = {}
+        # 扫描耗时大致与文件大小成正比，先提交大文件，避免最后只剩一个大文件拖住整个进程池
+        file_paths.sort(key=os.path.getsize, reverse=True)
+        
+        all_matches = defaultdict(list)
         all_unique_paths = set()
         all_path_mappings = []
         
-        max_threads = min(4, multiprocessing.cpu_count())
-        with ThreadPoolExecutor(max_workers=max_threads) as executor:
-            futures = [executor.submit(self.process_js_file, fp) for fp in file_paths]
-            
-            for future in futures:
-                matches, unique_paths, path_mappings = future.result()
+        # 正则扫描是CPU密集型任务，使用多进程绕过GIL
+        max_workers = min(len(file_paths), multiprocessing.cpu_count())
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(self,)) as executor:
+            # 逐个取出结果并汇总，汇总过的单文件结果随即释放，不在列表中保留到扫描结束
+            for matches, unique_paths, path_mappings, errors in executor.map(_process_js_file_worker, file_paths):
+                for message in errors:
+                    self.log.error(message)
                 for pattern_name, pattern_matches in matches.items():
-                    if pattern_name not in all_matches:
-                        all_matches[pattern_name] = []
                     all_matches[pattern_name].extend(pattern_matches)
                 all_unique_paths.update(unique_paths)
                 all_path_mappings.extend(path_mappings)
@@ -179,24 +205,69 @@ class JsFinderModule:
         
         scan_time = Utils().tellTime()
         
-        sidebar_items = []
-        total_matches = sum(len(pattern_matches) for pattern_matches in matches.values())
-        
         sorted_patterns = sorted(matches.items(), key=lambda x: len(x[1]), reverse=True)
         
-        # ###################### START: MODIFICATION 1 ######################
+        # 单次遍历同时生成侧边栏、表格视图和卡片视图的内容，每个匹配项只转义一次
+        sidebar_items = []
+        table_rows = []
+        card_parts = []
+        total_matches = 0
+        matched_pattern_count = 0
         # 修复: 为每个模式类型创建一个从0开始的索引，用于生成唯一的锚点ID
         for index, (pattern_name, pattern_matches) in enumerate(sorted_patterns):
-            if pattern_matches:
-                match_count = len(pattern_matches)
-                # 修复: 使用索引生成唯一的锚点ID，例如 "pattern-0", "pattern-1"
-                anchor_id = f"pattern-{index}"
-                # 修复: 对显示在侧边栏的 pattern_name 进行HTML转义，防止特殊字符破坏HTML结构
-                safe_pattern_name = html.escape(pattern_name)
-                sidebar_items.append(f'<li><a href="#{anchor_id}">{safe_pattern_name} <span class="count">{match_count}</span></a></li>')
-        # ####################### END: MODIFICATION 1 #######################
+            if not pattern_matches:
+                continue
+            
+            match_count = len(pattern_matches)
+            total_matches += match_count
+            matched_pattern_count += 1
+            # 修复: 使用索引生成唯一的锚点ID，例如 "pattern-0", "pattern-1"
+            anchor_id = f"pattern-{index}"
+            # 修复: 对所有输出到HTML的内容使用 html.escape()，防止特殊字符破坏HTML结构
+            safe_pattern_name = html.escape(pattern_name)
+            safe_pattern_name_attr = html.escape(pattern_name, quote=True)
+            sidebar_items.append(f'<li><a href="#{anchor_id}">{safe_pattern_name} <span class="count">{match_count}</span></a></li>')
+            
+            card_parts.append(f'<h2 id="{anchor_id}" data-pattern-name="{safe_pattern_name_attr}">{safe_pattern_name} <span class="pattern-count">{match_count}</span></h2>')
+            card_parts.append('<div class="match-grid">')
+            
+            for match_text, source, context in pattern_matches:
+                safe_match = html.escape(match_text)
+                safe_source = html.escape(source)
+                # 修复: 对 data-context 属性进行完整的转义，确保JS安全
+                safe_context_attr = html.escape(context, quote=True)
+                safe_context = html.escape(context)
+                
+                table_rows.append(f'''
+                            <tr data-type="{safe_pattern_name_attr}">
+                                <td>{safe_pattern_name}</td>
+                                <td class="match-text-cell">{safe_match}</td>
+                                <td>{safe_source}</td>
+                                <td>
+                                    <button class="context-btn" data-context="{safe_context_attr}">
+                                        查看上下文
+                                    </button>
+                                </td>
+                            </tr>
+                ''')
+                
+                highlighted_context = safe_context.replace(
+                    safe_match, 
+                    f'<span class="highlight">{safe_match}</span>'
+                )
+                
+                card_parts.append(f'''
+                <div class="match-item" data-type="{safe_pattern_name_attr}">
+                    <div class="match-text">{safe_match}</div>
+                    <div class="match-source">来源: {safe_source}</div>
+                    <div class="match-context">{highlighted_context}</div>
+                    <button class="context-toggle">展开全文</button>
+                </div>
+                ''')
+            
+            card_parts.append('</div>')
         
-        html_content = """
+        html_parts = ["""
         <!DOCTYPE html>
         <html lang="zh-CN">
         <head>
@@ -669,7 +740,7 @@ class JsFinderModule:
                         <span class="summary-label">总匹配项</span>
                     </div>
                     <div class="summary-item">
-                        <span class="summary-value">""" + str(len([p for p in matches.keys() if matches[p]])) + """</span>
+                        <span class="summary-value">""" + str(matched_pattern_count) + """</span>
                         <span class="summary-label">匹配的模式类型</span>
                     </div>
                     <div class="summary-item">
@@ -697,12 +768,12 @@ class JsFinderModule:
                 <div class="loader">
                     <p>正在加载数据...</p>
                 </div>
-        """
+        """]
         
         if not matches:
-            html_content += '<p class="no-results">未发现敏感信息</p>'
+            html_parts.append('<p class="no-results">未发现敏感信息</p>')
         
-        html_content += """
+        html_parts.append("""
                 <div class="table-view">
                     <table class="sensitive-table">
                         <thead>
@@ -714,84 +785,21 @@ class JsFinderModule:
                             </tr>
                         </thead>
                         <tbody>
-        """
+        """)
         
-        # ###################### START: MODIFICATION 2 ######################
-        # 修复: 遍历已排序的列表，并全面使用 html.escape()
-        for pattern_name, pattern_matches in sorted_patterns:
-            if not pattern_matches:
-                continue
-            
-            # 修复: 对所有输出到HTML的内容使用 html.escape()
-            safe_pattern_name = html.escape(pattern_name)
-            safe_pattern_name_attr = html.escape(pattern_name, quote=True)
-
-            for match_text, source, context in pattern_matches:
-                safe_match = html.escape(match_text)
-                safe_source = html.escape(source)
-                # 修复: 对 data-context 属性进行完整的转义，确保JS安全
-                safe_context_attr = html.escape(context, quote=True)
-                
-                html_content += f'''
-                            <tr data-type="{safe_pattern_name_attr}">
-                                <td>{safe_pattern_name}</td>
-                                <td class="match-text-cell">{safe_match}</td>
-                                <td>{safe_source}</td>
-                                <td>
-                                    <button class="context-btn" data-context="{safe_context_attr}">
-                                        查看上下文
-                                    </button>
-                                </td>
-                            </tr>
-                '''
-        # ####################### END: MODIFICATION 2 #######################
+        html_parts.extend(table_rows)
 
-        html_content += """
+        html_parts.append("""
                         </tbody>
                     </table>
                 </div>
                 
                 <div class="card-view active">
-        """
+        """)
         
-        # ###################### START: MODIFICATION 3 ######################
-        # 修复: 使用带索引的循环来生成唯一的ID，并全面使用 html.escape()
-        for index, (pattern_name, pattern_matches) in enumerate(sorted_patterns):
-            if not pattern_matches:
-                continue
-
-            # 修复: 使用索引生成唯一的锚点ID
-            anchor_id = f"pattern-{index}"
-            safe_pattern_name = html.escape(pattern_name)
-            safe_pattern_name_attr = html.escape(pattern_name, quote=True)
-            
-            html_content += f'<h2 id="{anchor_id}" data-pattern-name="{safe_pattern_name_attr}">{safe_pattern_name} <span class="pattern-count">{len(pattern_matches)}</span></h2>'
-            
-            html_content += '<div class="match-grid">'
-            
-            for match_text, source, context in pattern_matches:
-                safe_match = html.escape(match_text)
-                safe_source = html.escape(source)
-                safe_context = html.escape(context)
-                
-                highlighted_context = safe_context.replace(
-                    safe_match, 
-                    f'<span class="highlight">{safe_match}</span>'
-                )
-                
-                html_content += f'''
-                <div class="match-item" data-type="{safe_pattern_name_attr}">
-                    <div class="match-text">{safe_match}</div>
-                    <div class="match-source">来源: {safe_source}</div>
-                    <div class="match-context">{highlighted_context}</div>
-                    <button class="context-toggle">展开全文</button>
-                </div>
-                '''
-            
-            html_content += '</div>'
-        # ####################### END: MODIFICATION 3 #######################
+        html_parts.extend(card_parts)
 
-        html_content += """
+        html_parts.append("""
                 </div>
             </div>
             
@@ -999,19 +1007,33 @@ class JsFinderModule:
             </script>
         </body>
         </html>
-        """
+        """)
         
         with open(html_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            f.write(''.join(html_parts))
         
         return html_path
     
+    def generate_json_output(self, matches: Dict[str, List[Tuple[str, str, str]]]) -> str:
+        """生成JSON格式的结构化结果，供批量扫描的总览报告直接读取，无需再解析HTML"""
+        json_path = os.path.join(self.output_directory, 'sensitive_info.json')
+        sorted_patterns = sorted(matches.items(), key=lambda x: len(x[1]), reverse=True)
+        findings = {
+            pattern_name: [{"match": match_text, "source": source, "context": context}
+                           for match_text, source, context in pattern_matches]
+            for pattern_name, pattern_matches in sorted_patterns if pattern_matches
+        }
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(findings, f, ensure_ascii=False)
+        return json_path
+
     def save_results(self, matches: Dict, unique_paths: List, path_mappings: List) -> None:
         """保存扫描结果到文件"""
         if not os.path.exists(self.output_directory):
             os.makedirs(self.output_directory)
         
         html_path = self.generate_html_output(matches)
+        self.generate_json_output(matches)
         
         text_path = os.path.join(self.output_directory, 'sensitive_info.txt')
         with open(text_path, 'w', encoding='utf-8') as output_file:
@@ -14,6 +14,9 @@ from lib.DownloadJs import DownloadJs
 from lib.common.CreatLog import creatLog
 from lib.common.cmdline import CommandLines
 
+# 内联脚本中动态引用的JS路径，模块加载时编译一次
+_INLINE_SRC_RE = re.compile(r'src=["\'](.*?\.js)')
+
 
 class ParseJs():
     def __init__(self, projectTag, url, options):
@@ -26,6 +29,7 @@ class ParseJs():
         self.options = options
         self.proxy_data = {'http': self.options.proxy, 'https': self.options.proxy}
         self.base_url = url  # 新增基路径变量
+        self.html_content = None  # 首页HTML，供打包器检测复用，避免重复请求
         self._init_headers()
         DatabaseType(self.projectTag).createProjectDatabase(self.url, 1, "0")
         self.log = creatLog().get_logger()
@@ -39,9 +43,8 @@ class ParseJs():
             headers["Cookie"] = self.options.cookie
         self.header = headers
 
-    def _extract_base_url(self, html_content):
+    def _extract_base_url(self, soup):
         """从HTML中提取<base>标签修正基路径"""
-        soup = BeautifulSoup(html_content, "html.parser")
         base_tag = soup.find("base")
         if base_tag and base_tag.get("href"):
             return urljoin(self.url, base_tag.get("href"))
@@ -49,6 +52,7 @@ class ParseJs():
 
     def _process_script_tags(self, soup):
         """处理script标签的通用逻辑"""
+        inline_js = []
         for item in soup.find_all("script"):
             # 处理外部JS
             if js_path := item.get("src"):
@@ -56,36 +60,42 @@ class ParseJs():
             
             # 处理内联JS
             if js_code := item.text.encode():
-                self._save_inline_js(js_code)
+                inline_js.append(js_code)
+
+        if inline_js:
+            self._save_inline_js(inline_js)
 
-    def _save_inline_js(self, js_code):
-        """保存内联JS到数据库"""
-        js_tag = Utils().creatTag(6)
+    def _save_inline_js(self, js_codes):
+        """保存内联JS到数据库，所有内联脚本共用一个连接并在同一事务中提交"""
         res = urlparse(self.url)
         domain = res.netloc.replace(":", "_")
         db_path = os.path.join("tmp", f"{self.projectTag}_{domain}", f"{self.projectTag}.db")
         
         with sqlite3.connect(db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO js_file(name, path, local) VALUES(?, ?, ?)",
-                (f"{js_tag}.js", self.url, f"{js_tag}.js")
-            )
-            file_path = os.path.join("tmp", f"{self.projectTag}_{domain}", f"{js_tag}.js")
-            with open(file_path, "wb") as f:
-                f.write(js_code)
-            cursor.execute("UPDATE js_file SET success = 1 WHERE local=?", (f"{js_tag}.js",))
+            for js_code in js_codes:
+                js_tag = Utils().creatTag(6)
+                cursor.execute(
+                    "INSERT INTO js_file(name, path, local) VALUES(?, ?, ?)",
+                    (f"{js_tag}.js", self.url, f"{js_tag}.js")
+                )
+                file_path = os.path.join("tmp", f"{self.projectTag}_{domain}", f"{js_tag}.js")
+                with open(file_path, "wb") as f:
+                    f.write(js_code)
+                cursor.execute("UPDATE js_file SET success = 1 WHERE local=?", (f"{js_tag}.js",))
             conn.commit()
 
     def requestUrl(self):
         try:
             response = self._fetch_url()
-            self.base_url = self._extract_base_url(response.text)  # 更新基路径
-            soup = BeautifulSoup(response.text.replace("", ""), "html.parser")
-            
+            self.html_content = response.text
+            # 页面只解析一次，各处理步骤共用同一个soup
+            soup = BeautifulSoup(response.text, "html.parser")
+            self.base_url = self._extract_base_url(soup)  # 更新基路径
+
             self._process_script_tags(soup)
             self._process_link_tags(soup)
-            self._process_dynamic_js(soup, response.text)
+            self._process_dynamic_js(soup)
             
             self.dealJs(self.jsPaths)
         except Exception as e:
@@ -118,10 +128,10 @@ class ParseJs():
             if (href := item.get("href")) and href.endswith(".js"):
                 self.jsPaths.append(href)
 
-    def _process_dynamic_js(self, soup, html_content):
+    def _process_dynamic_js(self, soup):
         """处理动态生成的JS路径"""
         try:
-            js_in_script = self.scriptCrawling(html_content)
+            js_in_script = self.scriptCrawling(soup)
             self.jsPaths.extend(js_in_script)
         except Exception as e:
             self.log.error(f"[Error] scriptCrawling失败: {str(e)}")
@@ -143,22 +153,22 @@ class ParseJs():
         
         self.log.info(f"{Utils().tellTime()} 发现JS文件: {len(self.jsRealPaths)}个")
         domain = parsed.netloc.replace(":", "_")
-        DownloadJs(self.jsRealPaths, self.options).downloadJs(self.projectTag, domain, 0)
-        self._process_external_js(domain)
+        # 页面JS与外部输入的JS互不依赖，合并为一批在同一个线程池中并发下载
+        DownloadJs(self.jsRealPaths + self._process_external_js(), self.options).downloadJs(self.projectTag, domain, 0)
 
-    def _process_external_js(self, domain):
+    def _process_external_js(self):
         """处理外部输入的JS"""
         if hasattr(self.options, 'js') and self.options.js:
-            ext_js = self.options.js
-            DownloadJs(ext_js.split(','), self.options).downloadJs(self.projectTag, domain, 0)
+            return self.options.js.split(',')
+        return []
 
     def scriptCrawling(self, demo):
-        """从内联JS中提取路径"""
-        soup = BeautifulSoup(demo, "html.parser")
+        """从内联JS中提取路径，demo 可以是HTML文本或已解析的soup"""
+        soup = demo if isinstance(demo, BeautifulSoup) else BeautifulSoup(demo, "html.parser")
         found_paths = []
         for script in soup.find_all("script"):
             if script_content := script.string:
-                found_paths.extend(re.findall(r'src=["\'](.*?\.js)', str(script_content)))
+                found_paths.extend(_INLINE_SRC_RE.findall(str(script_content)))
         return list(set(found_paths))
 
     def parseJsStart(self):
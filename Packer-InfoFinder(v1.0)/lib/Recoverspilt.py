@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 
-import os, re, sqlite3
+import os, re, sqlite3, queue, threading
 from urllib.parse import urlparse, urljoin
 from lib.common.utils import Utils
 from lib.Database import DatabaseType
@@ -11,6 +11,42 @@ from lib.common.CreatLog import creatLog
 import deno_vm
 import esprima
 
+# 优先使用tree-sitter(C实现)解析JS，未安装时回退到纯Python的esprima
+try:
+    from tree_sitter import Language, Parser
+    import tree_sitter_javascript
+    _TS_JS_LANGUAGE = Language(tree_sitter_javascript.language())
+except Exception:
+    _TS_JS_LANGUAGE = None
+
+# 模块ID提取：{key: 与 ,key: 两种形式，去除引号后去重
+_MODULE_KEY_BRACE_RE = re.compile(r"\{(.*?)\:")
+_MODULE_KEY_COMMA_RE = re.compile(r"\,(.*?)\:")
+_QUOTE_STRIP = str.maketrans('', '', '"\'')
+# Regex回退方案与路径还原使用的模式：加载函数的参数名、异步JS文件名拼接片段、webpack publicPath
+_PARAM_BRACKET_RE = re.compile(r'\[.*?\]')
+_CHUNK_URL_RE = re.compile(r"\w\.p\+\"(.*?)\.js\"")
+_PUBLIC_PATH_RE = re.compile(r'(__webpack_require__\.p|\w\.p)\s*=\s*["\'](.*?)["\']')
+# 异步chunk加载必然会动态创建script标签，没有该特征的文件无需进入AST/Regex分析
+_SCRIPT_LOADER_MARKERS = (b'createElement("script")', b"createElement('script')")
+# 边分析边下载：攒够一批或等待超时即提交下载
+_DOWNLOAD_BATCH_SIZE = 50
+_DOWNLOAD_BATCH_WAIT = 1
+# 在同一个Deno VM中一次性计算所有模块ID对应的文件名，避免逐个ID往返通信
+_JS_COMPILE_ALL = """
+function js_compile_all(names) {
+    return names.map(function (name) {
+        try { return js_compile(name); } catch (e) { return null; }
+    });
+}
+"""
+
+
+def _extract_module_ids(code):
+    return list({name.translate(_QUOTE_STRIP) for pattern in (_MODULE_KEY_BRACE_RE, _MODULE_KEY_COMMA_RE)
+                 for name in pattern.findall(code)})
+
+
 class RecoverSpilt():
 
     def __init__(self, projectTag, options):
@@ -19,42 +55,46 @@ class RecoverSpilt():
         self.log = creatLog().get_logger()
         self.processed_files = set()
         self.pending_js_files = set()
-        self.js_split_id_counter = 1
+        self.download_queue = None
+        self.vm = None
+        self.conn = None
+        self.ts_parser = Parser(_TS_JS_LANGUAGE) if _TS_JS_LANGUAGE is not None else None
 
     def _get_db_connection(self):
-        projectDBPath = DatabaseType(self.projectTag).getPathfromDB() + self.projectTag + ".db"
-        conn = sqlite3.connect(os.sep.join(projectDBPath.split('/')))
-        conn.isolation_level = None
-        return conn
+        """整个还原过程复用同一个数据库连接，在 recoverStart 结束时关闭"""
+        if self.conn is None:
+            projectDBPath = DatabaseType(self.projectTag).getPathfromDB() + self.projectTag + ".db"
+            conn = sqlite3.connect(os.sep.join(projectDBPath.split('/')), isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-65536")
+            self.conn = conn
+        return self.conn
+
+    def _get_vm(self):
+        """整个还原过程复用同一个Deno VM，在 recoverStart 结束时销毁"""
+        if self.vm is None:
+            self.vm = deno_vm.VM(_JS_COMPILE_ALL).create()
+        return self.vm
 
     def _execute_in_deno(self, js_code_func, name_list):
-        filenames_found = set()
-        with deno_vm.VM() as vm:
-            vm.run(js_code_func)
-            for name in name_list:
-                try:
-                    param = int(name) if name.isdigit() else name
-                    result = vm.call("js_compile", param)
-                    if result and "undefined" not in str(result):
-                        filenames_found.add(str(result))
-                except Exception:
-                    continue
-        return filenames_found
+        vm = self._get_vm()
+        vm.run(js_code_func)
+        params = [int(name) if name.isdigit() else name for name in name_list]
+        results = vm.call("js_compile_all", params) or []
+        return {str(result) for result in results if result and "undefined" not in str(result)}
 
     def compile_from_ast(self, code_body, param_name, jsFilePath, parent_js_content):
         try:
-            pattern1 = re.compile(r"\{(.*?)\:")
-            pattern2 = re.compile(r"\,(.*?)\:")
-            code_body_for_regex = re.sub(r'\s', '', code_body)
-            nameList1 = pattern1.findall(code_body_for_regex)
-            nameList2 = pattern2.findall(code_body_for_regex)
-            nameList = list(set([name.replace('"', '').replace("'", "") for name in nameList1 + nameList2]))
+            code_body_for_regex = ''.join(code_body.split())  # 去除所有空白字符
+            nameList = _extract_module_ids(code_body_for_regex)
 
             if not nameList:
-                self.log.debug(f"在 {Utils().getFilename(jsFilePath)} 中未提取到有效的JS模块ID (AST)")
+                self.log.debug(f"在 {Utils.getFilename(jsFilePath)} 中未提取到有效的JS模块ID (AST)")
                 return
 
-            self.log.info(f"在 {Utils().getFilename(jsFilePath)} 中提取到 {len(nameList)} 个JS模块ID (AST)，正在解析...")
+            self.log.info(f"在 {Utils.getFilename(jsFilePath)} 中提取到 {len(nameList)} 个JS模块ID (AST)，正在解析...")
             js_code_func = f"function js_compile({param_name}){{ return {code_body} }}"
             filenames_found = self._execute_in_deno(js_code_func, nameList)
             
@@ -66,21 +106,18 @@ class RecoverSpilt():
     
     def compile_from_regex(self, jsCode, jsFilePath, parent_js_content):
         try:
-            variable = re.findall(r'\[.*?\]', jsCode)
+            # 只需要第一个参数列表，search 命中即停，不必收集全部匹配
+            variable = _PARAM_BRACKET_RE.search(jsCode)
             if not variable: return
 
-            variable = variable[0].replace("[", "").replace("]", "")
+            variable = variable.group(0).replace("[", "").replace("]", "")
             jsCodeFunc = "function js_compile(%s){js_url=" % (variable) + jsCode + "\nreturn js_url}"
 
-            pattern1 = re.compile(r"\{(.*?)\:")
-            pattern2 = re.compile(r"\,(.*?)\:")
-            nameList1 = pattern1.findall(jsCode)
-            nameList2 = pattern2.findall(jsCode)
-            nameList = list(set([name.replace('"', '').replace("'", "") for name in nameList1 + nameList2]))
+            nameList = _extract_module_ids(jsCode)
 
             if not nameList: return
 
-            self.log.info(f"在 {Utils().getFilename(jsFilePath)} 中提取到 {len(nameList)} 个JS模块ID (Regex)，正在解析...")
+            self.log.info(f"在 {Utils.getFilename(jsFilePath)} 中提取到 {len(nameList)} 个JS模块ID (Regex)，正在解析...")
             filenames_found = self._execute_in_deno(jsCodeFunc, nameList)
 
             if filenames_found:
@@ -93,21 +130,21 @@ class RecoverSpilt():
         conn = self._get_db_connection()
         cursor = conn.cursor()
         localFile = os.path.basename(jsFilePath)
-        
-        jsSplitId = self.js_split_id_counter
-        self.js_split_id_counter += 1
 
-        sql = "INSERT OR IGNORE INTO js_split_tree(id, jsCode, js_name) VALUES(?, ?, ?)"
-        cursor.execute(sql, (jsSplitId, code_snippet, localFile))
-        conn.commit()
+        sql = "INSERT OR IGNORE INTO js_split_tree(jsCode, js_name) VALUES(?, ?)"
+        cursor.execute(sql, (code_snippet, localFile))
 
         cursor.execute("SELECT path FROM js_file WHERE local=?", (localFile,))
         jsUrlPath = cursor.fetchone()[0]
-        conn.close()
+        cursor.close()
 
-        self.pending_js_files.update(
-            self.getRealFilePath(list(filenames_found), jsUrlPath, parent_js_content)
-        )
+        realPaths = self.getRealFilePath(list(filenames_found), jsUrlPath, parent_js_content)
+        for realPath in realPaths:
+            if realPath in self.pending_js_files:
+                continue
+            self.pending_js_files.add(realPath)
+            if self.download_queue is not None:
+                self.download_queue.put(realPath)
 
     def _build_full_url(self, path, script_url):
         """
@@ -150,7 +187,7 @@ class RecoverSpilt():
     def getRealFilePath(self, jsFileNames, jsUrlpath, parent_js_content):
         jsRealPaths = []
         # 尝试提取 publicPath
-        match = re.search(r'(__webpack_require__\.p|\w\.p)\s*=\s*["\'](.*?)["\']', parent_js_content)
+        match = _PUBLIC_PATH_RE.search(parent_js_content)
         if match:
             public_path = match.group(2)
             self.log.info(f"成功提取到 publicPath: '{public_path}'，将基于父JS路径智能合并。")
@@ -171,29 +208,64 @@ class RecoverSpilt():
         if jsFilePath in self.processed_files:
             return
         self.processed_files.add(jsFilePath)
+        jsFileName = Utils.getFilename(jsFilePath)
 
         try:
-            with open(jsFilePath, 'r', encoding='UTF-8', errors="ignore") as f:
-                js_content = f.read()
+            # 以字节读取：先在原始字节上判断特征，只有需要分析的文件才解码，tree-sitter也直接复用这份字节
+            with open(jsFilePath, 'rb') as f:
+                js_bytes = f.read()
 
-            self.log.info(f"[{Utils().tellTime()}] 正在使用AST分析文件: {Utils().getFilename(jsFilePath)}")
-            found_by_ast = self._analyze_with_ast(js_content, jsFilePath)
+            if not any(marker in js_bytes for marker in _SCRIPT_LOADER_MARKERS):
+                self.log.debug(f"{jsFileName} 中未发现动态创建script的代码，跳过分析")
+                return
+            js_content = js_bytes.decode('utf-8', errors="ignore")
+
+            self.log.info(f"[{Utils.tellTime()}] 正在使用AST分析文件: {jsFileName}")
+            found_by_ast = self._analyze_with_ast(js_content, js_bytes, jsFilePath)
 
             if not found_by_ast:
-                self.log.info(f"AST未能找到模式，在 {Utils().getFilename(jsFilePath)} 上尝试Regex回退方案...")
+                self.log.info(f"AST未能找到模式，在 {jsFileName} 上尝试Regex回退方案...")
                 self._analyze_with_regex(js_content, jsFilePath)
 
         except Exception as e:
-            self.log.error(f"[Err] 分析文件 {Utils().getFilename(jsFilePath)} 时发生未知错误: {e}")
+            self.log.error(f"[Err] 分析文件 {jsFileName} 时发生未知错误: {e}")
     
-    def _analyze_with_ast(self, js_content, jsFilePath):
+    def _analyze_with_ast(self, js_content, js_bytes, jsFilePath):
         try:
+            if self.ts_parser is not None:
+                return self._traverse_ts_tree(js_content, js_bytes, jsFilePath)
             ast = esprima.parseScript(js_content, {'range': True, 'tolerant': True})
             return self._traverse_ast(ast, js_content, jsFilePath)
         except Exception as e:
-            self.log.debug(f"[Debug] AST解析文件 {Utils().getFilename(jsFilePath)} 时失败: {e}")
+            self.log.debug(f"[Debug] AST解析文件 {Utils.getFilename(jsFilePath)} 时失败: {e}")
             return False
 
+    def _traverse_ts_tree(self, js_content, js_bytes, jsFilePath):
+        """与 _traverse_ast 相同的匹配规则，基于tree-sitter语法树实现(偏移量为字节)"""
+        stack = [self.ts_parser.parse(js_bytes).root_node]
+        while stack:
+            node = stack.pop()
+            if node.type == 'assignment_expression':
+                left = node.child_by_field_name('left')
+                func_node = node.child_by_field_name('right')
+                if left is not None and left.type == 'member_expression' and \
+                   func_node is not None and func_node.type in ('function_expression', 'function'):
+                    params = func_node.child_by_field_name('parameters')
+                    body = func_node.child_by_field_name('body')
+                    if params is not None and params.named_children and body is not None and \
+                       params.named_children[0].type == 'identifier':
+                        param_name = params.named_children[0].text.decode('utf-8', errors='ignore')
+                        for statement in body.named_children:
+                            if statement.type == 'return_statement' and statement.named_children:
+                                argument = statement.named_children[0]
+                                if js_bytes.find(b".js", argument.start_byte, argument.end_byte) != -1:
+                                    code_body = js_bytes[argument.start_byte:argument.end_byte].decode('utf-8', errors='ignore')
+                                    self.log.info(f"AST发现可能的异步加载函数: {Utils.getFilename(jsFilePath)}")
+                                    self.compile_from_ast(code_body, param_name, jsFilePath, js_content)
+                                    return True
+            stack.extend(reversed(node.named_children))
+        return False
+
     def _traverse_ast(self, node, js_content, jsFilePath):
         if not node or not isinstance(node, esprima.nodes.Node):
             return False
@@ -210,36 +282,61 @@ class RecoverSpilt():
                         
                         param_name = func_node.params[0].name
                         start, end = statement.argument.range
-                        code_body = js_content[start:end]
-                        
-                        if ".js" in code_body:
-                            self.log.info(f"AST发现可能的异步加载函数: {Utils().getFilename(jsFilePath)}")
+                        # 先在原文范围内查找，命中后再截取，避免为每个return语句复制子串
+                        if js_content.find(".js", start, end) != -1:
+                            code_body = js_content[start:end]
+                            self.log.info(f"AST发现可能的异步加载函数: {Utils.getFilename(jsFilePath)}")
                             self.compile_from_ast(code_body, param_name, jsFilePath, js_content)
                             return True
 
+        # dir() 按属性名字母序返回，需按源码位置排序子节点，与 tree-sitter 的遍历顺序保持一致，
+        # 否则存在多个候选函数时，选中哪一个会取决于是否安装了 tree-sitter
+        children = []
         for key in dir(node):
             if not key.startswith('_'):
                 child = getattr(node, key)
                 if isinstance(child, esprima.nodes.Node):
-                    if self._traverse_ast(child, js_content, jsFilePath):
-                        return True
+                    children.append(child)
                 elif isinstance(child, list):
-                    for item in child:
-                        if isinstance(item, esprima.nodes.Node):
-                            if self._traverse_ast(item, js_content, jsFilePath):
-                                return True
+                    children.extend(item for item in child if isinstance(item, esprima.nodes.Node))
+        children.sort(key=lambda child: child.range[0] if child.range else 0)
+        for child in children:
+            if self._traverse_ast(child, js_content, jsFilePath):
+                return True
         return False
 
     def _analyze_with_regex(self, js_content, jsFilePath):
-        if "document.createElement(\"script\")" in js_content:
-            pattern = re.compile(r"\w\.p\+\"(.*?)\.js\"")
-            jsCodeList = pattern.findall(js_content)
-            if jsCodeList:
-                 self.log.info(f"Regex发现 {len(jsCodeList)} 个可能的异步加载片段: {Utils().getFilename(jsFilePath)}")
-                 for jsCode in jsCodeList:
-                    if len(jsCode) < 30000:
-                        full_js_code = '"' + jsCode + '.js"'
-                        self.compile_from_regex(full_js_code, jsFilePath, js_content)
+        # checkCodeSpilting 已确认文件中存在动态创建script的代码，这里不再重复扫描全文
+        jsCodeList = _CHUNK_URL_RE.findall(js_content)
+        if jsCodeList:
+             self.log.info(f"Regex发现 {len(jsCodeList)} 个可能的异步加载片段: {Utils.getFilename(jsFilePath)}")
+             for jsCode in jsCodeList:
+                if len(jsCode) < 30000:
+                    full_js_code = '"' + jsCode + '.js"'
+                    self.compile_from_regex(full_js_code, jsFilePath, js_content)
+
+    def _download_worker(self, domain):
+        """消费下载队列，分批下载分析过程中发现的异步JS"""
+        batch = []
+        finished = False
+        while not finished:
+            timed_out = False
+            try:
+                jsRealPath = self.download_queue.get(timeout=_DOWNLOAD_BATCH_WAIT)
+                if jsRealPath is None:
+                    finished = True
+                else:
+                    batch.append(jsRealPath)
+            except queue.Empty:
+                timed_out = True
+            # 生产者逐个入队，队列在两次put之间经常是空的，所以只在攒满、等待超时或结束时才下载
+            if batch and (finished or timed_out or len(batch) >= _DOWNLOAD_BATCH_SIZE):
+                self.log.info(f"--- 开始下载 {len(batch)} 个新发现的异步JS文件 ---")
+                try:
+                    DownloadJs(batch, self.options).downloadJs(self.projectTag, domain, 999)
+                except Exception as e:
+                    self.log.error(f"[Err] 异步JS批量下载出错: {e}")
+                batch = []
 
     def recoverStart(self):
         projectPath = DatabaseType(self.projectTag).getPathfromDB()
@@ -250,16 +347,33 @@ class RecoverSpilt():
             for filename in filenames:
                 if filename.endswith(".js"):
                     all_js_files.append(os.path.join(parent, filename))
-        
-        for js_file_path in all_js_files:
-            self.checkCodeSpilting(js_file_path)
+
+        domain = urlparse(self.options.url).netloc
+        if ":" in domain:
+            domain = domain.replace(":", "_")
+
+        # 分析(CPU)与下载(网络)重叠进行，发现的新文件立即进入下载队列
+        self.download_queue = queue.Queue()
+        downloader = threading.Thread(target=self._download_worker, args=(domain,), daemon=True)
+        downloader.start()
+        try:
+            for js_file_path in all_js_files:
+                self.checkCodeSpilting(js_file_path)
+        finally:
+            self.download_queue.put(None)
+            downloader.join()
+            self.download_queue = None
+            if self.vm is not None:
+                try:
+                    self.vm.destroy()
+                except Exception as e:
+                    self.log.debug(f"[Debug] 关闭Deno VM失败: {e}")
+                self.vm = None
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
 
         if self.pending_js_files:
-            self.log.info(f"--- 共发现 {len(self.pending_js_files)} 个新的异步JS文件，开始下载 ---")
-            domain = urlparse(self.options.url).netloc
-            if ":" in domain:
-                domain = domain.replace(":", "_")
-            
-            DownloadJs(list(self.pending_js_files), self.options).downloadJs(self.projectTag, domain, 999)
+            self.log.info(f"--- 共发现并下载 {len(self.pending_js_files)} 个新的异步JS文件 ---")
         else:
-            self.log.info("--- 未发现新的异步JS文件 ---")
\ No newline at end of file
+            self.log.info("--- 未发现新的异步JS文件 ---")
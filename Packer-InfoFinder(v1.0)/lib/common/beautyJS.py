@@ -7,6 +7,9 @@ from lib.common.utils import Utils
 from lib.Database import DatabaseType
 from lib.common.cmdline import CommandLines
 
+# 只有花括号会改变缩进，其余字符交给正则引擎成段跳过，不再逐字符遍历
+_BRACE_RE = re.compile(r'[{}]')
+
 
 class BeautyJs():
 
@@ -19,16 +22,17 @@ class BeautyJs():
         formatted = []
         for line in lines:
             newline = []
-            for char in line:
-                newline.append(char)
-                if char == '{':
+            pos = 0
+            for brace in _BRACE_RE.finditer(line):
+                if brace.group() == '{':
                     indent += 1
-                    newline.append("\n")
-                    newline.append("\t" * indent)
-                if char == "}":
+                else:
                     indent -= 1
-                    newline.append("\n")
-                    newline.append("\t" * indent)
+                newline.append(line[pos:brace.end()])
+                newline.append("\n")
+                newline.append("\t" * indent)
+                pos = brace.end()
+            newline.append(line[pos:])
             formatted.append("\t" * indent + "".join(newline))
         open(filePath, "w", encoding="utf-8",errors="ignore").writelines(";\n".join(formatted))
 
@@ -36,6 +40,6 @@ class BeautyJs():
         projectPath = DatabaseType(self.projectTag).getPathfromDB()
         for parent, dirnames, filenames in os.walk(projectPath, followlinks=True):
             for filename in filenames:
-                if filename != self.projectTag + ".db":
+                if not filename.startswith(self.projectTag + ".db"):  # 跳过数据库及其 -wal/-shm 文件
                     filePath = os.path.join(parent, filename)
                     BeautyJs(self.projectTag).beauty_js(filePath)
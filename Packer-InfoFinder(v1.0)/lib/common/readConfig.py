@@ -4,23 +4,35 @@
 import os
 from configparser import ConfigParser
 
+# 配置文件路径 -> 已解析的ConfigParser；运行期间配置不会变化，每个文件只读取解析一次
+_PARSED_CONFIGS = {}
+
+
+def _load_config(path):
+    config = _PARSED_CONFIGS.get(path)
+    if config is None:
+        config = ConfigParser()
+        config.read(path, encoding="utf-8")
+        _PARSED_CONFIGS[path] = config
+    return config
+
 
 class ReadConfig(object):
 
     def __init__(self):
         self.path = os.getcwd() + os.sep + "config.ini"  # 配置文件地址
         self.langPath = os.getcwd() + os.sep + "doc/lang.ini"  # 配置文件地址
-        self.config = ConfigParser()
+        self.config = None  # 首次取值时指向共享的已解析配置
         self.res = []
 
     def getValue(self, sections, key):
-        self.config.read(self.path, encoding="utf-8")
+        self.config = _load_config(self.path)
         options = self.config[sections][key]
         self.res.append(options)
         return self.res
 
     def getLang(self, sections, key):
-        self.config.read(self.langPath, encoding="utf-8")
+        self.config = _load_config(self.langPath)
         options = self.config[sections][key]
         self.res.append(options)
         return self.res
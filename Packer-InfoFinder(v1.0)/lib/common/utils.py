@@ -1,7 +1,7 @@
 # !/usr/bin/env python3
 # -*- encoding: utf-8 -*-
 
-import os,random,locale,time,shutil
+import os,random,locale,time
 # from lib.common.cmdline import CommandLines
 
 
@@ -14,7 +14,8 @@ class Utils():
             salt += random.choice(H)
         return salt
 
-    def getFilename(self, url):
+    @staticmethod
+    def getFilename(url):
         filename = url.split('/')[-1]
         filename = filename.split('?')[0]
         return filename
@@ -60,28 +61,7 @@ class Utils():
         return content[startIndex:endIndex]
 
 
-    def tellTime(self): #时间输出
+    @staticmethod
+    def tellTime(): #时间输出
         localtime = "[" + str(time.strftime('%H:%M:%S',time.localtime(time.time()))) + "] "
         return localtime
-
-    def getMD5(self,file_path):
-        files_md5 = os.popen('md5 %s' % file_path).read().strip()
-        file_md5 = files_md5.replace('MD5 (%s) = ' % file_path, '')
-        return file_md5
-
-    def copyPath(self,path,out):
-        out = out + os.sep + path.split(os.sep)[-1]
-        os.mkdir(out)
-        for files in os.listdir(path):
-            name = os.path.join(path, files)
-            back_name = os.path.join(out, files)
-            if os.path.isfile(name):
-                if os.path.isfile(back_name):
-                    if self.getMD5(name) != self.getMD5(back_name):
-                        shutil.copy(name,back_name)
-                else:
-                    shutil.copy(name, back_name)
-            else:
-                if not os.path.isdir(back_name):
-                    os.makedirs(back_name)
-                self.main(name, back_name)